@@ -1,7 +1,18 @@
 from django.contrib import admin
-from .models import Categoria, Equipamento
+from .models import Categoria, Equipamento, Tarefa
 # Register your models here.
 
 admin.site.register(Categoria)
 
-admin.site.register(Equipamento)
\ No newline at end of file
+admin.site.register(Equipamento)
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'status', 'progresso', 'total', 'tentativas', 'criada_em')
+    list_filter = ('status', 'tipo')
+    readonly_fields = ('criada_em', 'atualizada_em', 'iniciada_em', 'concluida_em')
+
+    def get_queryset(self, request):
+        # parametros (CSV importado) e resultado podem ser grandes
+        return super().get_queryset(request).defer('parametros', 'resultado')
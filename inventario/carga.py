@@ -0,0 +1,481 @@
+"""
+Teste de carga das views do inventário.
+
+Sobe o projeto em localhost (WSGI com pool de threads ou ASGI com asyncio,
+em um ou mais processos compartilhando o mesmo socket) e dispara uma mistura
+configurável de requisições de listagem, busca, detalhe, cadastro e edição.
+Os POSTs seguem o fluxo de CSRF de um navegador: GET do formulário, leitura
+do cookie ``csrftoken`` e do campo ``csrfmiddlewaretoken``, e POST.
+
+Usado pelo comando ``python manage.py teste_carga``.
+"""
+import asyncio
+import http.client
+import multiprocessing
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import unquote, urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.db import OperationalError, connections
+from django.db.backends.signals import connection_created
+
+# Peso padrão de cada tipo de requisição na mistura
+MIX_PADRAO = {
+    'lista': 50,
+    'busca': 20,
+    'detalhe': 20,
+    'adicionar': 5,
+    'editar': 5,
+}
+
+# Posições do array de contadores compartilhado entre os processos do servidor
+ESPERAS_BLOQUEIO = 0
+TEMPO_ESPERA_MS = 1
+ERROS_BLOQUEIO = 2
+
+COMANDOS_ESCRITA = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+RE_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+# ==================== SERVIDOR ====================
+
+def _instalar_medicao_sqlite(contadores, limiar):
+    """
+    Conta as esperas por bloqueio do SQLite nas conexões deste processo.
+
+    O módulo sqlite3 não expõe o busy handler, então a espera é estimada:
+    escritas que demoram mais que ``limiar`` segundos contam como espera por
+    bloqueio, e erros "database is locked" contam como bloqueios que
+    estouraram o timeout.
+    """
+    def medir(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as exc:
+            if 'locked' in str(exc):
+                with contadores.get_lock():
+                    contadores[ERROS_BLOQUEIO] += 1
+            raise
+        finally:
+            decorrido = time.perf_counter() - inicio
+            if decorrido > limiar and sql.lstrip().upper().startswith(COMANDOS_ESCRITA):
+                with contadores.get_lock():
+                    contadores[ESPERAS_BLOQUEIO] += 1
+                    contadores[TEMPO_ESPERA_MS] += decorrido * 1000
+
+    def ao_conectar(sender, connection, **kwargs):
+        if connection.vendor == 'sqlite' and medir not in connection.execute_wrappers:
+            connection.execute_wrappers.append(medir)
+
+    connection_created.connect(ao_conectar, weak=False)
+
+
+class _HandlerSilencioso(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class _ServidorWSGI(WSGIServer):
+    """
+    wsgiref usando um socket já aberto e um pool fixo de threads
+    """
+
+    def __init__(self, sock, threads):
+        super().__init__(sock.getsockname(), _HandlerSilencioso, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.setup_environ()
+        self.pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            connections.close_all()
+
+
+async def _atender_asgi(application, reader, writer):
+    """
+    Servidor HTTP/1.1 mínimo para o ASGI (uma requisição por conexão)
+    """
+    try:
+        linha = await reader.readline()
+        if not linha:
+            return
+        metodo, alvo, _ = linha.decode('latin-1').split(' ', 2)
+        headers = []
+        while True:
+            linha = await reader.readline()
+            if linha in (b'\r\n', b'\n', b''):
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            headers.append((nome.strip().lower().encode('latin-1'), valor.strip().encode('latin-1')))
+        tamanho = int(dict(headers).get(b'content-length', b'0'))
+        corpo = await reader.readexactly(tamanho) if tamanho else b''
+
+        caminho, _, query = alvo.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': metodo,
+            'scheme': 'http',
+            'path': unquote(caminho),
+            'raw_path': caminho.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername')[:2],
+            'server': writer.get_extra_info('sockname')[:2],
+        }
+        recebido = False
+
+        async def receive():
+            nonlocal recebido
+            if not recebido:
+                recebido = True
+                return {'type': 'http.request', 'body': corpo, 'more_body': False}
+            # Aguarda indefinidamente, como se o cliente continuasse conectado
+            await asyncio.Future()
+
+        async def send(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                status = mensagem['status']
+                linhas = [f'HTTP/1.1 {status} {http.client.responses.get(status, "")}'.encode('latin-1')]
+                for nome, valor in mensagem.get('headers', []):
+                    linhas.append(nome + b': ' + valor)
+                linhas.append(b'Connection: close')
+                writer.write(b'\r\n'.join(linhas) + b'\r\n\r\n')
+            elif mensagem['type'] == 'http.response.body':
+                writer.write(mensagem.get('body', b''))
+                await writer.drain()
+
+        await application(scope, receive, send)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def _servir(sock, modo, threads, contadores, limiar):
+    """
+    Ponto de entrada de cada processo do servidor (criado com fork)
+    """
+    _instalar_medicao_sqlite(contadores, limiar)
+
+    if modo == 'wsgi':
+        from projeto_django.wsgi import application
+
+        servidor = _ServidorWSGI(sock, threads)
+        servidor.set_app(application)
+        servidor.serve_forever()
+    else:
+        from projeto_django.asgi import application
+
+        async def principal():
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+            servidor = await asyncio.start_server(
+                lambda reader, writer: _atender_asgi(application, reader, writer),
+                sock=sock,
+            )
+            async with servidor:
+                await servidor.serve_forever()
+
+        asyncio.run(principal())
+
+
+class Servidor:
+    """
+    Sobe o projeto em 127.0.0.1 com ``processos`` processos e ``threads``
+    threads por processo. Usar como context manager.
+
+    No modo ASGI as views síncronas rodam pelo asgiref; ``threads`` define
+    apenas o executor padrão do loop.
+    """
+
+    def __init__(self, modo, processos, threads, limiar_bloqueio_ms=20):
+        self.modo = modo
+        self.processos = processos
+        self.threads = threads
+        self.limiar = limiar_bloqueio_ms / 1000
+        self.contadores = multiprocessing.get_context('fork').Array('d', 3)
+        self.filhos = []
+
+    def __enter__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(1024)
+        self.porta = self.sock.getsockname()[1]
+
+        # Conexões abertas não podem ser herdadas pelos processos filhos
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        for _ in range(self.processos):
+            filho = contexto.Process(
+                target=_servir,
+                args=(self.sock, self.modo, self.threads, self.contadores, self.limiar),
+                daemon=True,
+            )
+            filho.start()
+            self.filhos.append(filho)
+
+        self._aguardar()
+        return self
+
+    def __exit__(self, *exc):
+        for filho in self.filhos:
+            filho.terminate()
+        for filho in self.filhos:
+            filho.join()
+        self.sock.close()
+
+    def _aguardar(self, tempo_limite=30):
+        limite = time.monotonic() + tempo_limite
+        while True:
+            try:
+                conexao = http.client.HTTPConnection('127.0.0.1', self.porta, timeout=5)
+                conexao.request('GET', '/')
+                resposta = conexao.getresponse()
+                resposta.read()
+                conexao.close()
+            except OSError:
+                if time.monotonic() > limite:
+                    raise
+                time.sleep(0.1)
+                continue
+            if resposta.status != 200:
+                raise RuntimeError(f'O servidor respondeu {resposta.status} em GET /')
+            return
+
+    def ler_contadores(self, zerar=True):
+        with self.contadores.get_lock():
+            valores = {
+                'esperas_bloqueio': int(self.contadores[ESPERAS_BLOQUEIO]),
+                'tempo_espera_ms': round(self.contadores[TEMPO_ESPERA_MS], 1),
+                'erros_bloqueio': int(self.contadores[ERROS_BLOQUEIO]),
+            }
+            if zerar:
+                for indice in range(len(self.contadores)):
+                    self.contadores[indice] = 0
+        return valores
+
+
+# ==================== CLIENTE ====================
+
+class Cliente:
+    """
+    Cliente HTTP de uma thread: mantém os cookies (CSRF, sessão, mensagens)
+    entre as requisições, como um navegador
+    """
+
+    def __init__(self, porta, dados, semente, prefixo):
+        self.porta = porta
+        self.dados = dados
+        self.random = random.Random(semente)
+        self.cookies = {}
+        self.conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+        self.sequencia = 0
+        # Prefixo dos seriais cadastrados; precisa ser único em todo o banco
+        self.prefixo = prefixo
+
+    def requisitar(self, metodo, caminho, campos=None):
+        headers = {}
+        corpo = None
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{nome}={valor}' for nome, valor in self.cookies.items())
+        if campos is not None:
+            corpo = urlencode(campos)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        inicio = time.perf_counter()
+        try:
+            self.conexao.request(metodo, caminho, body=corpo, headers=headers)
+            resposta = self.conexao.getresponse()
+            conteudo = resposta.read()
+        except (OSError, http.client.HTTPException):
+            self.conexao.close()
+            return 0, time.perf_counter() - inicio, b''
+        decorrido = time.perf_counter() - inicio
+
+        for cabecalho in resposta.headers.get_all('Set-Cookie') or []:
+            for nome, morsel in SimpleCookie(cabecalho).items():
+                self.cookies[nome] = morsel.value
+        if resposta.will_close:
+            self.conexao.close()
+        return resposta.status, decorrido, conteudo
+
+    # Os tipos de requisição retornam (sucesso, segundos decorridos)
+
+    def _obter(self, caminho):
+        status, decorrido, _ = self.requisitar('GET', caminho)
+        return status == 200, decorrido
+
+    def _enviar_formulario(self, caminho, campos):
+        """
+        GET do formulário para obter o token CSRF, depois o POST.
+
+        Só conta como sucesso o redirecionamento (302) após salvar: um
+        formulário com erro de validação volta com 200.
+        """
+        status, decorrido, conteudo = self.requisitar('GET', caminho)
+        token = RE_CSRF.search(conteudo.decode('utf-8', 'replace'))
+        if status != 200 or token is None:
+            return False, decorrido
+        campos['csrfmiddlewaretoken'] = token.group(1)
+        status, decorrido, _ = self.requisitar('POST', caminho, campos)
+        return status == 302, decorrido
+
+    def _campos_equipamento(self, serial, categoria_id):
+        return {
+            'nome': f'Equipamento {serial}',
+            'serial': serial,
+            'data': (date.today() - timedelta(days=self.random.randint(0, 3650))).isoformat(),
+            'categoria': categoria_id,
+            'status': self.random.choice(['EM_USO', 'ESTOQUE', 'MANUTENCAO']),
+        }
+
+    def lista(self):
+        pagina = self.random.randint(1, self.dados['paginas'])
+        return self._obter(f'/?page={pagina}')
+
+    def busca(self):
+        termo = self.random.choice(self.dados['termos'])
+        return self._obter('/?' + urlencode({'busca': termo}))
+
+    def detalhe(self):
+        equipamento_id, _, _ = self.random.choice(self.dados['equipamentos'])
+        return self._obter(f'/equipamento/{equipamento_id}/')
+
+    def adicionar(self):
+        self.sequencia += 1
+        serial = f'{self.prefixo}-{self.sequencia}'
+        categoria_id = self.random.choice(self.dados['categorias'])
+        return self._enviar_formulario('/adicionar/', self._campos_equipamento(serial, categoria_id))
+
+    def editar(self):
+        equipamento_id, serial, categoria_id = self.random.choice(self.dados['equipamentos'])
+        return self._enviar_formulario(
+            f'/editar/{equipamento_id}/', self._campos_equipamento(serial, categoria_id)
+        )
+
+
+def executar_nivel(porta, concorrencia, duracao, mix, dados, semente=0):
+    """
+    Roda ``concorrencia`` clientes por ``duracao`` segundos e devolve as
+    latências (em segundos) e os erros de cada tipo de requisição
+    """
+    # A semente repete entre níveis e configurações; os seriais cadastrados não podem
+    rodada = uuid.uuid4().hex[:8]
+    tipos = list(mix)
+    pesos = [mix[tipo] for tipo in tipos]
+    latencias = {tipo: [] for tipo in tipos}
+    erros = {tipo: 0 for tipo in tipos}
+    trava = threading.Lock()
+    inicio_comum = threading.Barrier(concorrencia + 1)
+
+    def trabalhar(indice):
+        cliente = Cliente(porta, dados, semente * 1000 + indice, f'CARGA-{rodada}-{indice}')
+        locais = {tipo: [] for tipo in tipos}
+        falhas = {tipo: 0 for tipo in tipos}
+        inicio_comum.wait()
+        fim = time.perf_counter() + duracao
+        while time.perf_counter() < fim:
+            tipo = cliente.random.choices(tipos, pesos)[0]
+            sucesso, decorrido = getattr(cliente, tipo)()
+            if sucesso:
+                locais[tipo].append(decorrido)
+            else:
+                falhas[tipo] += 1
+        cliente.conexao.close()
+        with trava:
+            for tipo in tipos:
+                latencias[tipo].extend(locais[tipo])
+                erros[tipo] += falhas[tipo]
+
+    threads = [threading.Thread(target=trabalhar, args=(indice,)) for indice in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    inicio_comum.wait()
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencias, erros, time.perf_counter() - inicio
+
+
+# ==================== RESULTADOS ====================
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, erros, duracao):
+    """
+    Requisições por segundo e percentis de latência (ms) por tipo e no total
+    """
+    def metricas(valores, falhas):
+        ordenados = sorted(valores)
+        em_ms = lambda valor: None if valor is None else round(valor * 1000, 2)
+        return {
+            'requisicoes': len(ordenados),
+            'erros': falhas,
+            'rps': round(len(ordenados) / duracao, 2),
+            'p50_ms': em_ms(percentil(ordenados, 50)),
+            'p90_ms': em_ms(percentil(ordenados, 90)),
+            'p99_ms': em_ms(percentil(ordenados, 99)),
+            'max_ms': em_ms(ordenados[-1] if ordenados else None),
+        }
+
+    resumo = {tipo: metricas(latencias[tipo], erros[tipo]) for tipo in latencias}
+    resumo['total'] = metricas(
+        [valor for valores in latencias.values() for valor in valores],
+        sum(erros.values()),
+    )
+    return resumo
+
+
+def chave_execucao(execucao):
+    return (execucao['servidor'], execucao['processos'], execucao['threads'], execucao['concorrencia'])
+
+
+def comparar(anterior, atual):
+    """
+    Linhas (chave, tipo, rps anterior, rps atual, p99 anterior, p99 atual)
+    para as execuções presentes nos dois resultados
+    """
+    anteriores = {chave_execucao(execucao): execucao for execucao in anterior['execucoes']}
+    linhas = []
+    for execucao in atual['execucoes']:
+        base = anteriores.get(chave_execucao(execucao))
+        if base is None:
+            continue
+        for tipo, metricas in execucao['endpoints'].items():
+            if tipo not in base['endpoints']:
+                continue
+            antes = base['endpoints'][tipo]
+            linhas.append((
+                chave_execucao(execucao), tipo,
+                antes['rps'], metricas['rps'],
+                antes['p99_ms'], metricas['p99_ms'],
+            ))
+    return linhas
@@ -124,4 +124,51 @@ class EquipamentoForm(forms.ModelForm):
                 'A data de aquisição não pode ser no futuro.'
             )
         
-        return data
\ No newline at end of file
+        return data
+
+
+class ImportarEquipamentosForm(forms.Form):
+    """
+    Formulário de upload do CSV de importação (processado em segundo plano)
+    """
+    arquivo = forms.FileField(
+        label='Arquivo CSV',
+        widget=forms.ClearableFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv',
+        }),
+        error_messages={
+            'required': 'Selecione um arquivo CSV.',
+        },
+    )
+
+    def clean_arquivo(self):
+        """
+        Lê o conteúdo do arquivo como texto UTF-8
+        """
+        arquivo = self.cleaned_data.get('arquivo')
+
+        try:
+            conteudo = arquivo.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise forms.ValidationError(
+                'O arquivo deve estar codificado em UTF-8.'
+            )
+
+        if not conteudo.strip():
+            raise forms.ValidationError('O arquivo está vazio.')
+
+        return conteudo
+
+
+class AlterarStatusForm(forms.Form):
+    """
+    Novo status aplicado em massa aos equipamentos filtrados
+    """
+    novo_status = forms.ChoiceField(
+        choices=Equipamento.status_escolha,
+        error_messages={
+            'required': 'Selecione o novo status.',
+            'invalid_choice': 'Status inválido.',
+        },
+    )
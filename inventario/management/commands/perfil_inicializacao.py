@@ -0,0 +1,64 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o tempo de importação e a memória (RSS) de cada app, middleware, '
+        'URLconf e templates na inicialização do projeto'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'perfis', nargs='*',
+            help='Módulos de settings a medir (padrão: projeto_django.settings e projeto_django.settings_leitura)',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Imprime o resultado em JSON, em vez de tabela',
+        )
+
+    def handle(self, *args, **options):
+        perfis = options['perfis'] or ['projeto_django.settings', 'projeto_django.settings_leitura']
+        resultados = [self.medir(perfil) for perfil in perfis]
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+
+        for resultado in resultados:
+            self.stdout.write(self.style.MIGRATE_HEADING(resultado['settings']))
+            self.stdout.write(f'  {"etapa":<12} {"nome":<58} {"ms":>9} {"RSS KB":>8}')
+            for etapa in resultado['etapas']:
+                self.stdout.write(
+                    f'  {etapa["tipo"]:<12} {etapa["nome"]:<58} '
+                    f'{etapa["tempo_ms"]:>9.1f} {etapa["rss_kb"]:>8}'
+                )
+            self.stdout.write(
+                f'  Total: {resultado["tempo_total_ms"]:.1f} ms, '
+                f'RSS {resultado["rss_inicial_kb"]} KB -> {resultado["rss_final_kb"]} KB'
+            )
+            falhas = resultado['templates_com_erro']
+            if falhas:
+                self.stdout.write(self.style.WARNING(f'  {len(falhas)} template(s) com erro:'))
+                for falha in falhas:
+                    self.stdout.write(self.style.WARNING(f'    {falha["template"]}: {falha["erro"]}'))
+            self.stdout.write('')
+
+    def medir(self, perfil):
+        """
+        Roda a medição em um processo novo, onde nada foi importado ainda
+        """
+        processo = subprocess.run(
+            [sys.executable, '-m', 'projeto_django.inicializacao', perfil],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if processo.returncode != 0:
+            raise CommandError(f'Falha ao medir {perfil}:\n{processo.stderr}')
+        return json.loads(processo.stdout)
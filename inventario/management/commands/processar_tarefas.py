@@ -0,0 +1,181 @@
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+# As funções abaixo rodam dentro dos processos do pool. Os processos são
+# criados com "spawn", então este módulo é importado antes do Django estar
+# configurado: os models só podem ser importados depois de django.setup().
+
+def _inicializar_processo(settings_module):
+    # Ctrl-C no terminal chega a todo o grupo de processos; quem encerra os
+    # filhos (e devolve as tarefas deles) é o processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    django.setup()
+
+
+def _interromper(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _executar(tarefa_id):
+    from inventario.tarefas import executar_tarefa
+
+    try:
+        return executar_tarefa(tarefa_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Processa as tarefas em segundo plano (importação, exportação, alterações em massa)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processos', type=int, default=2,
+            help='Quantidade de processos executando tarefas em paralelo (padrão: 2)',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=2.0,
+            help='Segundos entre consultas à fila quando não há tarefas (padrão: 2)',
+        )
+        parser.add_argument(
+            '--uma-vez', action='store_true',
+            help='Encerra quando a fila estiver vazia, em vez de aguardar novas tarefas',
+        )
+        parser.add_argument(
+            '--tempo-limite', type=int, default=600,
+            help='Segundos sem atualização para considerar uma tarefa travada (padrão: 600)',
+        )
+        parser.add_argument(
+            '--intervalo-recuperacao', type=float, default=60,
+            help='Segundos entre verificações de tarefas travadas (padrão: 60)',
+        )
+
+    def handle(self, *args, **options):
+        from inventario.tarefas import identificador_worker, reivindicar_tarefa, renovar_tarefas
+
+        processos = max(1, options['processos'])
+        worker = identificador_worker()
+        limite = timedelta(seconds=options['tempo_limite'])
+
+        self.stdout.write(f'Worker {worker} iniciado com {processos} processo(s)')
+
+        # Não compartilhar conexões abertas com os processos filhos
+        connections.close_all()
+
+        # SIGTERM (systemd, docker stop, kill) encerra como o Ctrl-C
+        signal.signal(signal.SIGTERM, _interromper)
+
+        executor = self.criar_executor(processos)
+        ativas = {}
+        proxima_recuperacao = 0
+        try:
+            while True:
+                # Tarefas em andamento não contam como travadas, mesmo sem progresso
+                if ativas:
+                    renovar_tarefas([tarefa.id for tarefa in ativas.values()], worker)
+
+                if time.monotonic() >= proxima_recuperacao:
+                    self.recuperar_travadas(limite)
+                    proxima_recuperacao = time.monotonic() + options['intervalo_recuperacao']
+
+                while len(ativas) < processos:
+                    tarefa = reivindicar_tarefa(worker)
+                    if tarefa is None:
+                        break
+                    self.stdout.write(f'Executando {tarefa}')
+                    try:
+                        ativas[executor.submit(_executar, tarefa.id)] = tarefa
+                    except BrokenProcessPool:
+                        executor = self.reiniciar_executor(executor, processos, ativas, [tarefa])
+
+                if not ativas:
+                    if options['uma_vez']:
+                        break
+                    time.sleep(options['intervalo'])
+                    continue
+
+                concluidas, _ = wait(ativas, timeout=options['intervalo'], return_when=FIRST_COMPLETED)
+                perdidas = []
+                for futuro in concluidas:
+                    tarefa = ativas.pop(futuro)
+                    try:
+                        status = futuro.result()
+                    except BrokenProcessPool:
+                        perdidas.append(tarefa)
+                    except Exception as exc:
+                        self.stderr.write(f'Erro ao executar {tarefa.tipo} #{tarefa.id}: {exc}')
+                    else:
+                        if status is None:
+                            # A tarefa foi devolvida à fila enquanto este processo a executava
+                            status = 'resultado descartado'
+                        self.stdout.write(f'{tarefa.tipo} #{tarefa.id}: {status}')
+                if perdidas:
+                    executor = self.reiniciar_executor(executor, processos, ativas, perdidas)
+        except KeyboardInterrupt:
+            self.stdout.write('Encerrando: devolvendo as tarefas em execução à fila...')
+            self.encerrar_executor(executor)
+            executor = None
+            self.devolver(list(ativas.values()), 'O worker que executava a tarefa foi encerrado.')
+            ativas.clear()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+    def criar_executor(self, processos):
+        return ProcessPoolExecutor(
+            max_workers=processos,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_processo,
+            initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+        )
+
+    def reiniciar_executor(self, executor, processos, ativas, perdidas):
+        """
+        Um processo do pool morreu: todas as tarefas em andamento no pool
+        são perdidas. Elas voltam para a fila (ou falham, se esgotaram as
+        tentativas) e um novo pool é criado.
+        """
+        self.stderr.write('Pool de processos interrompido.')
+        self.devolver(perdidas + list(ativas.values()), 'O processo que executava a tarefa foi encerrado.')
+        ativas.clear()
+        executor.shutdown(wait=False, cancel_futures=True)
+        return self.criar_executor(processos)
+
+    def encerrar_executor(self, executor):
+        """
+        Termina os processos do pool sem esperar as tarefas em andamento
+        """
+        # ProcessPoolExecutor só expõe terminate_workers() a partir do Python 3.14
+        for processo in list((getattr(executor, '_processes', None) or {}).values()):
+            processo.terminate()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    def devolver(self, tarefas, mensagem):
+        from inventario.tarefas import devolver_tarefas
+
+        if not tarefas:
+            return
+        devolvidas, falharam = devolver_tarefas([tarefa.id for tarefa in tarefas], mensagem)
+        self.stderr.write(
+            f'{devolvidas} tarefa(s) devolvida(s) à fila, {falharam} marcada(s) como FALHOU'
+        )
+
+    def recuperar_travadas(self, limite):
+        from inventario.tarefas import recuperar_tarefas_travadas
+
+        devolvidas, falharam = recuperar_tarefas_travadas(limite)
+        if devolvidas or falharam:
+            self.stdout.write(self.style.WARNING(
+                f'Tarefas travadas: {devolvidas} devolvida(s) à fila, {falharam} marcada(s) como FALHOU'
+            ))
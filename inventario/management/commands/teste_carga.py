@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+from datetime import date, timedelta
+from itertools import product
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+
+def _lista_inteiros(valor):
+    return [int(item) for item in valor.split(',') if item.strip()]
+
+
+def _mix(valor):
+    from inventario.carga import MIX_PADRAO
+
+    mix = {}
+    for item in valor.split(','):
+        tipo, separador, peso = item.partition('=')
+        tipo = tipo.strip()
+        if not separador:
+            raise argparse.ArgumentTypeError(f'"{item}" não está no formato tipo=peso')
+        if tipo not in MIX_PADRAO:
+            raise argparse.ArgumentTypeError(
+                f'tipo de requisição desconhecido: "{tipo}" (use {", ".join(MIX_PADRAO)})'
+            )
+        try:
+            mix[tipo] = float(peso)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'peso inválido para {tipo}: "{peso.strip()}"') from None
+    mix = {tipo: peso for tipo, peso in mix.items() if peso > 0}
+    if not mix:
+        raise argparse.ArgumentTypeError('informe ao menos um tipo com peso maior que zero')
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o projeto em localhost e mede requisições/s, latência por tipo de '
+        'requisição e esperas por bloqueio do SQLite em vários níveis de concorrência'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--servidor', default='wsgi',
+            help='Servidores a comparar, separados por vírgula: wsgi, asgi (padrão: wsgi)',
+        )
+        parser.add_argument(
+            '--processos', type=_lista_inteiros, default=[1],
+            help='Quantidades de processos do servidor, ex.: 1,2,4 (padrão: 1)',
+        )
+        parser.add_argument(
+            '--threads', type=_lista_inteiros, default=[4],
+            help='Threads por processo, ex.: 1,4,8 (padrão: 4)',
+        )
+        parser.add_argument(
+            '--concorrencia', type=_lista_inteiros, default=[1, 2, 4, 8, 16],
+            help='Clientes simultâneos em cada nível (padrão: 1,2,4,8,16)',
+        )
+        parser.add_argument(
+            '--duracao', type=float, default=10,
+            help='Segundos de carga em cada nível de concorrência (padrão: 10)',
+        )
+        parser.add_argument(
+            '--mix', type=_mix, default=None,
+            help='Pesos das requisições, ex.: lista=50,busca=20,detalhe=20,adicionar=5,editar=5',
+        )
+        parser.add_argument(
+            '--semear', type=int, default=500,
+            help='Quantidade mínima de equipamentos no banco de teste (padrão: 500)',
+        )
+        parser.add_argument(
+            '--limiar-bloqueio-ms', type=float, default=20,
+            help='Escritas mais lentas que isto contam como espera por bloqueio (padrão: 20)',
+        )
+        parser.add_argument(
+            '--usar-banco-atual', action='store_true',
+            help='Usa o banco configurado em vez de uma cópia temporária (os POSTs gravam nele)',
+        )
+        parser.add_argument('--semente', type=int, default=0, help='Semente da escolha das requisições')
+        parser.add_argument('--saida', help='Arquivo JSON onde gravar os resultados')
+        parser.add_argument('--comparar', help='Resultado JSON anterior para comparar com esta execução')
+
+    def handle(self, *args, **options):
+        from inventario.carga import MIX_PADRAO, Servidor, comparar, executar_nivel, resumir
+
+        servidores = [item.strip() for item in options['servidor'].split(',') if item.strip()]
+        if set(servidores) - {'wsgi', 'asgi'}:
+            raise CommandError('--servidor aceita apenas wsgi e asgi.')
+        mix = options['mix'] or MIX_PADRAO
+
+        banco_temporario = None
+        if not options['usar_banco_atual']:
+            banco_temporario = self.preparar_banco()
+
+        try:
+            dados = self.preparar_dados(options['semear'])
+            resultado = {
+                'metadados': {
+                    'data': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'plataforma': platform.platform(),
+                    'cpus': os.cpu_count(),
+                    'duracao': options['duracao'],
+                    'mix': mix,
+                    'equipamentos': len(dados['equipamentos']),
+                },
+                'execucoes': [],
+            }
+
+            configuracoes = product(servidores, options['processos'], options['threads'])
+            for servidor, processos, threads in configuracoes:
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f'{servidor.upper()}: {processos} processo(s), {threads} thread(s)'
+                ))
+                with Servidor(servidor, processos, threads, options['limiar_bloqueio_ms']) as app:
+                    app.ler_contadores(zerar=True)
+                    for concorrencia in options['concorrencia']:
+                        latencias, erros, duracao = executar_nivel(
+                            app.porta, concorrencia, options['duracao'], mix, dados, options['semente'],
+                        )
+                        execucao = {
+                            'servidor': servidor,
+                            'processos': processos,
+                            'threads': threads,
+                            'concorrencia': concorrencia,
+                            'duracao': round(duracao, 3),
+                            'endpoints': resumir(latencias, erros, duracao),
+                            'sqlite': app.ler_contadores(zerar=True),
+                        }
+                        resultado['execucoes'].append(execucao)
+                        self.exibir(execucao)
+        finally:
+            if banco_temporario:
+                connections.close_all()
+                shutil.rmtree(banco_temporario, ignore_errors=True)
+
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                json.dump(resultado, arquivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Resultados gravados em {options["saida"]}'))
+
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+            self.stdout.write(self.style.MIGRATE_HEADING('Comparação com a execução anterior'))
+            for chave, tipo, rps_antes, rps_agora, p99_antes, p99_agora in comparar(anterior, resultado):
+                variacao = f'{(rps_agora - rps_antes) / rps_antes * 100:+.1f}%' if rps_antes else 'n/d'
+                self.stdout.write(
+                    f'  {"/".join(str(parte) for parte in chave):<20} {tipo:<10} '
+                    f'rps {rps_antes:>8} -> {rps_agora:>8} ({variacao})  '
+                    f'p99 {p99_antes} -> {p99_agora} ms'
+                )
+
+    def preparar_banco(self):
+        """
+        Copia o banco SQLite para um diretório temporário e passa a usá-lo,
+        para que os cadastros e edições do teste não alterem os dados reais
+        """
+        configuracao = connections['default'].settings_dict
+        if configuracao['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('O banco não é SQLite: use --usar-banco-atual para testar nele.')
+
+        diretorio = tempfile.mkdtemp(prefix='teste_carga_')
+        destino = os.path.join(diretorio, 'carga.sqlite3')
+        if os.path.exists(configuracao['NAME']):
+            shutil.copy(configuracao['NAME'], destino)
+
+        connections.close_all()
+        configuracao['NAME'] = destino
+        call_command('migrate', verbosity=0, interactive=False)
+        self.stdout.write(f'Usando cópia do banco em {destino}')
+        return diretorio
+
+    def preparar_dados(self, minimo):
+        """
+        Garante equipamentos suficientes e carrega os ids usados pelos clientes
+        """
+        from inventario.models import Categoria, Equipamento
+
+        categorias = list(Categoria.objects.values_list('id', flat=True))
+        if not categorias:
+            categorias = [Categoria.objects.create(nome='Carga').id]
+
+        faltando = minimo - Equipamento.objects.count()
+        if faltando > 0:
+            hoje = date.today()
+            Equipamento.objects.bulk_create([
+                Equipamento(
+                    nome=f'Equipamento Semeado {indice}',
+                    serial=f'SEMENTE-{indice}',
+                    data=hoje - timedelta(days=indice % 3650),
+                    categoria_id=categorias[indice % len(categorias)],
+                    status=['EM_USO', 'ESTOQUE', 'MANUTENCAO'][indice % 3],
+                )
+                for indice in range(faltando)
+            ], ignore_conflicts=True)
+
+        equipamentos = list(Equipamento.objects.values_list('id', 'serial', 'categoria_id'))
+        termos = sorted({serial[:3] for _, serial, _ in equipamentos}) or ['a']
+        return {
+            'equipamentos': equipamentos,
+            'categorias': categorias,
+            'termos': termos,
+            # 12 equipamentos por página na lista
+            'paginas': max(1, (len(equipamentos) + 11) // 12),
+        }
+
+    def exibir(self, execucao):
+        self.stdout.write(f'  Concorrência {execucao["concorrencia"]}:')
+        for tipo, metricas in execucao['endpoints'].items():
+            self.stdout.write(
+                f'    {tipo:<10} {metricas["rps"]:>8.1f} req/s  '
+                f'p50 {metricas["p50_ms"]} ms  p90 {metricas["p90_ms"]} ms  '
+                f'p99 {metricas["p99_ms"]} ms  erros {metricas["erros"]}'
+            )
+        sqlite = execucao['sqlite']
+        self.stdout.write(
+            f'    SQLite: {sqlite["esperas_bloqueio"]} espera(s) por bloqueio '
+            f'({sqlite["tempo_espera_ms"]} ms), {sqlite["erros_bloqueio"]} erro(s) "database is locked"'
+        )
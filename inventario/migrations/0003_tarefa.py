@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_equipamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50)),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDA', 'Concluída'), ('FALHOU', 'Falhou')], db_index=True, default='PENDENTE', max_length=15)),
+                ('progresso', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('mensagem', models.TextField(blank=True)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('max_tentativas', models.PositiveIntegerField(default=3)),
+                ('disponivel_em', models.DateTimeField(auto_now_add=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizada_em', models.DateTimeField(auto_now=True)),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['-criada_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_tarefa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versão do Inventário',
+                'verbose_name_plural': 'Versões do Inventário',
+            },
+        ),
+    ]
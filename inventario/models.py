@@ -39,4 +39,81 @@ class Equipamento(models.Model):
 
     def __str__(self):
         # Retorna uma representação útil, combinando nome e serial.
-        return f"{self.nome} ({self.serial})"
\ No newline at end of file
+        return f"{self.nome} ({self.serial})"
+
+
+#Número de versão do inventário: incrementado a cada alteração de equipamentos
+#ou categorias, usado para invalidar os relatórios em cache
+class VersaoInventario(models.Model):
+    numero = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versão do Inventário"
+        verbose_name_plural = "Versões do Inventário"
+
+    def __str__(self):
+        return f"Versão {self.numero}"
+
+    @classmethod
+    def atual(cls):
+        return cls.objects.filter(pk=1).values_list('numero', flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls):
+        if not cls.objects.filter(pk=1).update(numero=models.F('numero') + 1):
+            cls.objects.get_or_create(pk=1, defaults={'numero': 1})
+
+
+#Tarefa em segundo plano: guarda no próprio banco as operações demoradas
+#(importação, exportação, alteração em massa...) para o worker processar
+class Tarefa(models.Model):
+    PENDENTE = 'PENDENTE'
+    EXECUTANDO = 'EXECUTANDO'
+    CONCLUIDA = 'CONCLUIDA'
+    FALHOU = 'FALHOU'
+
+    status_escolha = [
+    (PENDENTE, 'Pendente'),
+    (EXECUTANDO, 'Executando'),
+    (CONCLUIDA, 'Concluída'),
+    (FALHOU, 'Falhou'),
+    ]
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=15,
+        choices = status_escolha,
+        default = PENDENTE,
+        db_index=True,
+    )
+    progresso = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    mensagem = models.TextField(blank=True)
+    resultado = models.JSONField(null=True, blank=True)
+    tentativas = models.PositiveIntegerField(default=0)
+    max_tentativas = models.PositiveIntegerField(default=3)
+    #momento a partir do qual a tarefa pode ser (re)executada, usado no atraso entre tentativas
+    disponivel_em = models.DateTimeField(auto_now_add=True)
+    worker = models.CharField(max_length=100, blank=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['-criada_em']
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def finalizada(self):
+        return self.status in (self.CONCLUIDA, self.FALHOU)
+
+    @property
+    def percentual(self):
+        if self.total:
+            return min(100, int(self.progresso * 100 / self.total))
+        return 100 if self.status == self.CONCLUIDA else 0
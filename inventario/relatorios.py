@@ -0,0 +1,236 @@
+"""
+Relatórios gerenciais do inventário.
+
+As agregações são feitas no banco sempre que possível (TruncMonth, Count e
+agregações condicionais). Estatísticas que o SQLite não calcula, como a
+mediana da idade, são obtidas lendo apenas (id, categoria_id, data) em
+lotes paginados pelo id e acumulando histogramas em arrays compactos: a
+memória usada depende do número de categorias, não do número de
+equipamentos.
+
+Os resultados ficam em cache por versão do inventário (VersaoInventario),
+então visualizações repetidas não consultam o banco novamente.
+"""
+from array import array
+from datetime import date
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+
+from .models import Categoria, Equipamento, VersaoInventario
+
+# Quantidade de linhas lidas do banco por consulta no modo em lotes
+TAMANHO_LOTE = 2000
+
+# Idades acima deste limite (em meses) entram na última posição do histograma
+MAX_MESES = 240
+
+# (rótulo, idade mínima em anos, idade máxima em anos)
+FAIXAS_IDADE = [
+    ('Até 1 ano', 0, 1),
+    ('1 a 3 anos', 1, 3),
+    ('3 a 5 anos', 3, 5),
+    ('Mais de 5 anos', 5, None),
+]
+
+
+# ==================== AGREGAÇÕES NO BANCO ====================
+
+def aquisicoes_por_mes():
+    """
+    Quantidade de equipamentos adquiridos em cada mês
+    """
+    linhas = (
+        Equipamento.objects
+        .annotate(mes=TruncMonth('data'))
+        .values('mes')
+        .annotate(total=Count('id'))
+        .order_by('mes')
+    )
+    return [
+        {'mes': linha['mes'].strftime('%Y-%m'), 'total': linha['total']}
+        for linha in linhas
+    ]
+
+
+def status_por_categoria():
+    """
+    Quantidade de equipamentos em cada status, por categoria
+    """
+    agregacoes = {
+        codigo: Count('equipamento', filter=Q(equipamento__status=codigo))
+        for codigo, _ in Equipamento.status_escolha
+    }
+    linhas = (
+        Categoria.objects
+        .annotate(total=Count('equipamento'), **agregacoes)
+        .order_by('nome')
+        .values('nome', 'total', *agregacoes)
+    )
+    return [
+        {
+            'categoria': linha['nome'],
+            'total': linha['total'],
+            'status': [linha[codigo] for codigo, _ in Equipamento.status_escolha],
+        }
+        for linha in linhas
+    ]
+
+
+def faixas_de_idade(hoje=None):
+    """
+    Quantidade de equipamentos em cada faixa de idade, por categoria
+    """
+    hoje = hoje or date.today()
+    agregacoes = {}
+    for indice, (_, minimo, maximo) in enumerate(FAIXAS_IDADE):
+        filtro = Q(equipamento__data__lte=_anos_atras(hoje, minimo))
+        if maximo is not None:
+            filtro &= Q(equipamento__data__gt=_anos_atras(hoje, maximo))
+        agregacoes[f'faixa_{indice}'] = Count('equipamento', filter=filtro)
+
+    linhas = (
+        Categoria.objects
+        .annotate(**agregacoes)
+        .order_by('nome')
+        .values('nome', *agregacoes)
+    )
+    return [
+        {
+            'categoria': linha['nome'],
+            'faixas': [linha[chave] for chave in agregacoes],
+        }
+        for linha in linhas
+    ]
+
+
+def _anos_atras(hoje, anos):
+    try:
+        return hoje.replace(year=hoje.year - anos)
+    except ValueError:
+        # 29 de fevereiro em ano não bissexto
+        return hoje.replace(year=hoje.year - anos, day=28)
+
+
+# ==================== AGREGAÇÃO EM LOTES ====================
+
+class HistogramaIdade:
+    """
+    Histograma de idades (em meses) por categoria, em arrays de inteiros
+    """
+
+    def __init__(self, max_meses=MAX_MESES):
+        self.max_meses = max_meses
+        self.contagens = {}
+        self.soma_meses = {}
+
+    def adicionar(self, chave, meses):
+        contagem = self.contagens.get(chave)
+        if contagem is None:
+            contagem = self.contagens[chave] = array('L', [0]) * (self.max_meses + 1)
+            self.soma_meses[chave] = 0
+        contagem[min(max(meses, 0), self.max_meses)] += 1
+        self.soma_meses[chave] += meses
+
+    def total(self, chave):
+        return sum(self.contagens[chave])
+
+    def media(self, chave):
+        return self.soma_meses[chave] / self.total(chave)
+
+    def percentil(self, chave, p):
+        """
+        Menor idade (em meses) que cobre a fração ``p`` dos equipamentos
+        """
+        contagem = self.contagens[chave]
+        alvo = p * self.total(chave)
+        acumulado = 0
+        for meses, quantidade in enumerate(contagem):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                return meses
+        return self.max_meses
+
+
+def estatisticas_de_idade(hoje=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Idade média, mediana e percentil 90 por categoria (em meses).
+
+    As linhas são lidas em lotes pela chave primária, sem manter um cursor
+    aberto durante toda a leitura (o que bloquearia escritas no SQLite).
+    """
+    hoje = hoje or date.today()
+    histograma = HistogramaIdade()
+    consulta = Equipamento.objects.order_by('id').values_list('id', 'categoria_id', 'data')
+
+    ultimo_id = 0
+    while True:
+        lote = list(consulta.filter(id__gt=ultimo_id)[:tamanho_lote])
+        if not lote:
+            break
+        for _, categoria_id, data in lote:
+            meses = (hoje.year - data.year) * 12 + hoje.month - data.month - (hoje.day < data.day)
+            histograma.adicionar(categoria_id, meses)
+        ultimo_id = lote[-1][0]
+
+    nomes = dict(Categoria.objects.filter(id__in=histograma.contagens).values_list('id', 'nome'))
+    resultado = [
+        {
+            'categoria': nomes.get(categoria_id, categoria_id),
+            'total': histograma.total(categoria_id),
+            'media_meses': round(histograma.media(categoria_id), 1),
+            'mediana_meses': histograma.percentil(categoria_id, 0.5),
+            'p90_meses': histograma.percentil(categoria_id, 0.9),
+        }
+        for categoria_id in histograma.contagens
+    ]
+    return sorted(resultado, key=lambda linha: linha['categoria'])
+
+
+# ==================== CACHE POR VERSÃO ====================
+
+RELATORIOS = {
+    'aquisicoes': aquisicoes_por_mes,
+    'status': status_por_categoria,
+    'idade': faixas_de_idade,
+    'estatisticas_idade': estatisticas_de_idade,
+}
+
+
+def obter_relatorio(nome, versao=None):
+    """
+    Retorna o relatório ``nome``, calculando apenas se o inventário mudou
+    desde o último cálculo (ou se o dia mudou, para as idades)
+    """
+    if versao is None:
+        versao = VersaoInventario.atual()
+    chave = f'relatorio:{nome}:{versao}:{date.today().isoformat()}'
+    resultado = cache.get(chave)
+    if resultado is None:
+        resultado = RELATORIOS[nome]()
+        cache.set(chave, resultado, timeout=24 * 60 * 60)
+    return resultado
+
+
+def linhas_csv(nome):
+    """
+    Cabeçalho e linhas do relatório ``nome`` para exportação em CSV
+    """
+    dados = obter_relatorio(nome)
+    if nome == 'aquisicoes':
+        yield ['mes', 'total']
+        for linha in dados:
+            yield [linha['mes'], linha['total']]
+    elif nome == 'status':
+        yield ['categoria', 'total'] + [codigo for codigo, _ in Equipamento.status_escolha]
+        for linha in dados:
+            yield [linha['categoria'], linha['total']] + linha['status']
+    elif nome == 'idade':
+        yield ['categoria'] + [rotulo for rotulo, _, _ in FAIXAS_IDADE]
+        for linha in dados:
+            yield [linha['categoria']] + linha['faixas']
+    elif nome == 'estatisticas_idade':
+        yield ['categoria', 'total', 'media_meses', 'mediana_meses', 'p90_meses']
+        for linha in dados:
+            yield [linha[campo] for campo in ('categoria', 'total', 'media_meses', 'mediana_meses', 'p90_meses')]
@@ -0,0 +1,35 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Categoria, Equipamento, VersaoInventario
+
+_estado = threading.local()
+
+
+@contextmanager
+def sem_incrementar_versao():
+    """
+    Suspende o incremento por linha na thread atual. Usado em gravações em
+    lote, que chamam VersaoInventario.incrementar() uma única vez no final.
+    """
+    anterior = getattr(_estado, 'silenciado', False)
+    _estado.silenciado = True
+    try:
+        yield
+    finally:
+        _estado.silenciado = anterior
+
+
+@receiver(post_save, sender=Equipamento)
+@receiver(post_delete, sender=Equipamento)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def incrementar_versao(sender, **kwargs):
+    """
+    Qualquer alteração no inventário invalida os relatórios em cache
+    """
+    if not getattr(_estado, 'silenciado', False):
+        VersaoInventario.incrementar()
@@ -0,0 +1,397 @@
+"""
+Fila de tarefas em segundo plano usando apenas o banco de dados.
+
+As views apenas enfileiram a tarefa (enfileirar) e redirecionam o usuário
+para a página de status; o comando ``manage.py processar_tarefas`` reivindica
+as tarefas pendentes e as executa em um pool de processos.
+"""
+import csv
+import io
+import os
+import socket
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .forms import EquipamentoForm
+from .models import Categoria, Equipamento, Tarefa, VersaoInventario
+from .signals import sem_incrementar_versao
+
+# Tipo da tarefa -> função que a executa
+TIPOS = {}
+
+# Colunas usadas na importação e na exportação de CSV
+COLUNAS_CSV = ['nome', 'serial', 'data', 'categoria', 'status']
+
+# Quantidade de linhas processadas entre duas atualizações de progresso
+INTERVALO_PROGRESSO = 200
+
+
+def registrar(tipo):
+    """
+    Decorator que registra a função responsável por um tipo de tarefa
+    """
+    def decorator(funcao):
+        TIPOS[tipo] = funcao
+        return funcao
+    return decorator
+
+
+def enfileirar(tipo, **parametros):
+    """
+    Cria uma tarefa pendente; retorna a instância criada
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f'Tipo de tarefa desconhecido: {tipo}')
+    return Tarefa.objects.create(tipo=tipo, parametros=parametros)
+
+
+def identificador_worker():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def reivindicar_tarefa(worker):
+    """
+    Marca a próxima tarefa pendente como em execução para este worker.
+
+    A reivindicação é feita com um UPDATE condicionado ao status PENDENTE,
+    então dois workers nunca executam a mesma tarefa, mesmo no SQLite
+    (que não suporta SELECT ... FOR UPDATE).
+    """
+    agora = timezone.now()
+    candidatas = (
+        Tarefa.objects
+        .filter(
+            status=Tarefa.PENDENTE,
+            disponivel_em__lte=agora,
+            tentativas__lt=F('max_tentativas'),
+        )
+        .order_by('disponivel_em', 'id')
+        .values_list('id', flat=True)[:10]
+    )
+    for tarefa_id in list(candidatas):
+        if _tentar_reivindicar(tarefa_id, worker, agora):
+            # Quem só acompanha a execução não precisa de parâmetros e resultado
+            return Tarefa.objects.defer('parametros', 'resultado').get(id=tarefa_id)
+    return None
+
+
+def _tentar_reivindicar(tarefa_id, worker, agora):
+    """
+    UPDATE condicionado: só um worker consegue mudar a tarefa de PENDENTE
+    para EXECUTANDO; os demais recebem False
+    """
+    return bool(Tarefa.objects.filter(
+        id=tarefa_id,
+        status=Tarefa.PENDENTE,
+        tentativas__lt=F('max_tentativas'),
+    ).update(
+        status=Tarefa.EXECUTANDO,
+        worker=worker,
+        tentativas=F('tentativas') + 1,
+        iniciada_em=agora,
+        atualizada_em=agora,
+    ))
+
+
+def devolver_tarefas(ids, mensagem):
+    """
+    Devolve para a fila tarefas interrompidas (processo do pool morto ou
+    worker encerrado). As que já esgotaram ``max_tentativas`` são marcadas
+    como FALHOU, para que uma tarefa que derruba o processo não volte para
+    a fila para sempre.
+
+    Retorna (devolvidas, falharam).
+    """
+    agora = timezone.now()
+    tarefas = Tarefa.objects.filter(id__in=ids, status=Tarefa.EXECUTANDO)
+    falharam = tarefas.filter(tentativas__gte=F('max_tentativas')).update(
+        status=Tarefa.FALHOU,
+        mensagem=mensagem,
+        concluida_em=agora,
+        atualizada_em=agora,
+    )
+    devolvidas = tarefas.filter(tentativas__lt=F('max_tentativas')).update(
+        status=Tarefa.PENDENTE,
+        worker='',
+        mensagem=f'{mensagem} Nova tentativa agendada.',
+        disponivel_em=agora,
+        atualizada_em=agora,
+    )
+    return devolvidas, falharam
+
+
+def renovar_tarefas(ids, worker):
+    """
+    Marca como atualizadas as tarefas que ``worker`` ainda executa, para que
+    tarefas longas que não reportam progresso não sejam tidas como travadas
+    """
+    return Tarefa.objects.filter(id__in=ids, status=Tarefa.EXECUTANDO, worker=worker).update(
+        atualizada_em=timezone.now(),
+    )
+
+
+def recuperar_tarefas_travadas(limite):
+    """
+    Devolve para a fila as tarefas em execução sem atualização há mais de
+    ``limite`` (worker encerrado no meio da execução); retorna
+    (devolvidas, falharam)
+    """
+    travadas = Tarefa.objects.filter(
+        status=Tarefa.EXECUTANDO,
+        atualizada_em__lt=timezone.now() - limite,
+    ).values_list('id', flat=True)
+    return devolver_tarefas(list(travadas), 'Execução interrompida (sem atualização).')
+
+
+def reportar_progresso(tarefa, progresso, total=None, mensagem=None):
+    """
+    Atualiza o progresso da tarefa direto no banco (sem salvar o objeto inteiro)
+    """
+    campos = {'progresso': progresso, 'atualizada_em': timezone.now()}
+    if total is not None:
+        campos['total'] = total
+    if mensagem is not None:
+        campos['mensagem'] = mensagem
+    Tarefa.objects.filter(id=tarefa.id).update(**campos)
+    for campo, valor in campos.items():
+        setattr(tarefa, campo, valor)
+
+
+def executar_tarefa(tarefa_id):
+    """
+    Executa uma tarefa já reivindicada e registra o resultado.
+
+    Em caso de erro a tarefa volta para a fila com atraso crescente até
+    atingir ``max_tentativas``; depois disso é marcada como FALHOU.
+
+    O resultado só é gravado se a tarefa ainda pertence a esta execução
+    (mesmo worker e mesma tentativa). Se ela foi devolvida à fila enquanto
+    rodava, o resultado é descartado e a função retorna None.
+    """
+    tarefa = Tarefa.objects.get(id=tarefa_id)
+    funcao = TIPOS.get(tarefa.tipo)
+    desta_execucao = Tarefa.objects.filter(
+        id=tarefa.id,
+        status=Tarefa.EXECUTANDO,
+        worker=tarefa.worker,
+        tentativas=tarefa.tentativas,
+    )
+
+    try:
+        if funcao is None:
+            raise ValueError(f'Tipo de tarefa desconhecido: {tarefa.tipo}')
+        resultado = funcao(tarefa, **tarefa.parametros)
+    except Exception as exc:
+        agora = timezone.now()
+        erro = f'{type(exc).__name__}: {exc}'
+        if funcao is not None and tarefa.tentativas < tarefa.max_tentativas:
+            atualizadas = desta_execucao.update(
+                status=Tarefa.PENDENTE,
+                worker='',
+                mensagem=f'Tentativa {tarefa.tentativas} falhou ({erro}). Nova tentativa agendada.',
+                disponivel_em=agora + timedelta(seconds=2 ** tarefa.tentativas * 5),
+                atualizada_em=agora,
+            )
+            return Tarefa.PENDENTE if atualizadas else None
+
+        atualizadas = desta_execucao.update(
+            status=Tarefa.FALHOU,
+            mensagem=erro,
+            concluida_em=agora,
+            atualizada_em=agora,
+        )
+        return Tarefa.FALHOU if atualizadas else None
+
+    agora = timezone.now()
+    atualizadas = desta_execucao.update(
+        status=Tarefa.CONCLUIDA,
+        resultado=resultado,
+        mensagem='',
+        progresso=tarefa.total or tarefa.progresso,
+        concluida_em=agora,
+        atualizada_em=agora,
+    )
+    return Tarefa.CONCLUIDA if atualizadas else None
+
+
+def _filtrar_equipamentos(busca=None, categoria=None, status=None):
+    """
+    Aplica os mesmos filtros da lista de equipamentos
+    """
+    equipamentos = Equipamento.objects.all()
+    if busca:
+        equipamentos = equipamentos.filter(
+            Q(nome__icontains=busca) |
+            Q(serial__icontains=busca)
+        )
+    if categoria:
+        equipamentos = equipamentos.filter(categoria_id=categoria)
+    if status:
+        equipamentos = equipamentos.filter(status=status)
+    return equipamentos
+
+
+# ==================== TIPOS DE TAREFA ====================
+
+@registrar('importar_csv')
+def importar_csv(tarefa, conteudo):
+    """
+    Importa equipamentos de um CSV (nome, serial, data, categoria, status).
+    Cada linha passa pelas mesmas validações do formulário de cadastro.
+
+    As linhas são gravadas em lotes; cada lote é confirmado na mesma
+    transação que registra em ``resultado`` quantas linhas já foram
+    processadas, então uma nova tentativa continua do último lote
+    confirmado em vez de reimportar (e acusar serial duplicado).
+
+    O incremento da versão do inventário por linha fica suspenso durante a
+    importação; a versão é incrementada uma única vez no final, mesmo que a
+    importação falhe depois de confirmar alguns lotes.
+    """
+    linhas = list(csv.DictReader(io.StringIO(conteudo)))
+    parcial = tarefa.resultado or {}
+    inicio = parcial.get('linhas_processadas', 0)
+    criados = parcial.get('criados', 0)
+    erros = parcial.get('erros', [])
+    total_erros = parcial.get('total_erros', 0)
+    reportar_progresso(tarefa, inicio, total=len(linhas))
+
+    categorias = {c.nome: c.id for c in Categoria.objects.all()}
+
+    alterou = False
+    try:
+        with sem_incrementar_versao():
+            for inicio_lote in range(inicio, len(linhas), INTERVALO_PROGRESSO):
+                lote = linhas[inicio_lote:inicio_lote + INTERVALO_PROGRESSO]
+                with transaction.atomic():
+                    for numero, linha in enumerate(lote, start=inicio_lote + 1):
+                        nome_categoria = (linha.get('categoria') or '').strip()
+                        if nome_categoria and nome_categoria not in categorias:
+                            categorias[nome_categoria] = Categoria.objects.get_or_create(nome=nome_categoria)[0].id
+                            alterou = True
+
+                        form = EquipamentoForm({
+                            'nome': linha.get('nome') or '',
+                            'serial': linha.get('serial') or '',
+                            'data': linha.get('data') or '',
+                            'categoria': categorias.get(nome_categoria, ''),
+                            'status': (linha.get('status') or 'EM_USO').strip().upper(),
+                        })
+                        if form.is_valid():
+                            form.save()
+                            criados += 1
+                            alterou = True
+                        else:
+                            total_erros += 1
+                            if len(erros) < 100:
+                                mensagens = '; '.join(
+                                    f'{campo}: {", ".join(lista)}' for campo, lista in form.errors.items()
+                                )
+                                erros.append(f'Linha {numero}: {mensagens}')
+
+                    processadas = inicio_lote + len(lote)
+                    Tarefa.objects.filter(id=tarefa.id).update(
+                        resultado={
+                            'linhas_processadas': processadas,
+                            'criados': criados,
+                            'erros': erros,
+                            'total_erros': total_erros,
+                        },
+                        progresso=processadas,
+                        atualizada_em=timezone.now(),
+                    )
+    finally:
+        if alterou:
+            VersaoInventario.incrementar()
+
+    reportar_progresso(tarefa, len(linhas))
+    return {'criados': criados, 'erros': erros, 'total_erros': total_erros}
+
+
+@registrar('exportar_csv')
+def exportar_csv(tarefa, busca=None, categoria=None, status=None):
+    """
+    Gera um CSV com os equipamentos filtrados em MEDIA_ROOT/exportacoes;
+    o resultado guarda apenas o caminho do arquivo
+    """
+    equipamentos = _filtrar_equipamentos(busca, categoria, status)
+    reportar_progresso(tarefa, 0, total=equipamentos.count())
+
+    arquivo = os.path.join('exportacoes', f'tarefa_{tarefa.id}.csv')
+    caminho = os.path.join(settings.MEDIA_ROOT, arquivo)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    linhas = equipamentos.order_by('id').values_list(
+        'nome', 'serial', 'data', 'categoria__nome', 'status'
+    )
+    numero = 0
+    # Grava em um arquivo temporário e renomeia no fim: uma tentativa que
+    # falhar no meio não deixa um CSV incompleto disponível para download
+    with open(caminho + '.tmp', 'w', newline='', encoding='utf-8') as saida:
+        writer = csv.writer(saida)
+        writer.writerow(COLUNAS_CSV)
+        for numero, (nome, serial, data, categoria_nome, status_atual) in enumerate(
+            linhas.iterator(chunk_size=INTERVALO_PROGRESSO), start=1
+        ):
+            writer.writerow([nome, serial, data.isoformat(), categoria_nome, status_atual])
+            if numero % INTERVALO_PROGRESSO == 0:
+                reportar_progresso(tarefa, numero)
+    os.replace(caminho + '.tmp', caminho)
+
+    return {
+        'arquivo': arquivo,
+        'nome_arquivo': f'equipamentos_{date.today():%Y%m%d}.csv',
+        'linhas': numero,
+    }
+
+
+@registrar('alterar_status')
+def alterar_status(tarefa, novo_status, busca=None, categoria=None, status=None):
+    """
+    Altera o status de todos os equipamentos filtrados, em lotes
+    """
+    if novo_status not in dict(Equipamento.status_escolha):
+        raise ValueError(f'Status inválido: {novo_status}')
+
+    ids = list(
+        _filtrar_equipamentos(busca, categoria, status)
+        .exclude(status=novo_status)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    reportar_progresso(tarefa, 0, total=len(ids))
+
+    alterados = 0
+    for inicio in range(0, len(ids), INTERVALO_PROGRESSO):
+        lote = ids[inicio:inicio + INTERVALO_PROGRESSO]
+        with transaction.atomic():
+            alterados += Equipamento.objects.filter(id__in=lote).update(status=novo_status)
+        reportar_progresso(tarefa, inicio + len(lote))
+
+    # update() não dispara os signals de post_save
+    if alterados:
+        VersaoInventario.incrementar()
+
+    return {'alterados': alterados}
+
+
+@registrar('recalcular_estatisticas')
+def recalcular_estatisticas(tarefa):
+    """
+    Recalcula os totais por status e por categoria
+    """
+    por_status = dict(
+        Equipamento.objects.values_list('status').annotate(total=Count('id')).order_by()
+    )
+    por_categoria = dict(
+        Categoria.objects.annotate(total=Count('equipamento')).values_list('nome', 'total')
+    )
+    return {
+        'total': sum(por_status.values()),
+        'por_status': por_status,
+        'por_categoria': por_categoria,
+    }
@@ -1,3 +1,436 @@
-from django.test import TestCase
+import argparse
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from projeto_django import settings_leitura
+from projeto_django.inicializacao import _carregar_templates
+
+from . import carga, tarefas
+from .management.commands.teste_carga import _mix
+from .models import Categoria, Equipamento, Tarefa, VersaoInventario
+from .relatorios import HistogramaIdade, _anos_atras, faixas_de_idade, obter_relatorio
+
+
+class FilaDeTarefasTests(TestCase):
+    """
+    Reivindicação, novas tentativas e recuperação de tarefas travadas
+    """
+
+    def registrar_tipo(self, tipo, funcao):
+        tarefas.TIPOS[tipo] = funcao
+        self.addCleanup(tarefas.TIPOS.pop, tipo)
+
+    def test_apenas_um_worker_reivindica_a_tarefa(self):
+        tarefa = tarefas.enfileirar('recalcular_estatisticas')
+        agora = timezone.now()
+
+        # Os dois workers viram a tarefa como candidata; só o primeiro UPDATE vence
+        self.assertTrue(tarefas._tentar_reivindicar(tarefa.id, 'worker-a', agora))
+        self.assertFalse(tarefas._tentar_reivindicar(tarefa.id, 'worker-b', agora))
+
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, Tarefa.EXECUTANDO)
+        self.assertEqual(tarefa.worker, 'worker-a')
+        self.assertEqual(tarefa.tentativas, 1)
+        self.assertIsNone(tarefas.reivindicar_tarefa('worker-b'))
+
+    def test_nova_tentativa_ate_max_tentativas_e_depois_falha(self):
+        def falhar(tarefa):
+            raise RuntimeError('erro proposital')
+
+        self.registrar_tipo('teste_falha', falhar)
+        tarefa = tarefas.enfileirar('teste_falha')
+        Tarefa.objects.filter(id=tarefa.id).update(max_tentativas=2)
+
+        reivindicada = tarefas.reivindicar_tarefa('worker')
+        self.assertEqual(tarefas.executar_tarefa(reivindicada.id), Tarefa.PENDENTE)
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, Tarefa.PENDENTE)
+        self.assertGreater(tarefa.disponivel_em, timezone.now())
+
+        # Atraso entre tentativas: ainda não pode ser reivindicada
+        self.assertIsNone(tarefas.reivindicar_tarefa('worker'))
+        Tarefa.objects.filter(id=tarefa.id).update(disponivel_em=timezone.now())
+
+        reivindicada = tarefas.reivindicar_tarefa('worker')
+        self.assertEqual(tarefas.executar_tarefa(reivindicada.id), Tarefa.FALHOU)
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, Tarefa.FALHOU)
+        self.assertEqual(tarefa.tentativas, 2)
+        self.assertIn('erro proposital', tarefa.mensagem)
+
+    def test_recuperar_tarefas_travadas(self):
+        antiga = timezone.now() - timedelta(hours=1)
+        travada = Tarefa.objects.create(tipo='recalcular_estatisticas', status=Tarefa.EXECUTANDO, tentativas=1)
+        esgotada = Tarefa.objects.create(tipo='recalcular_estatisticas', status=Tarefa.EXECUTANDO, tentativas=3)
+        recente = Tarefa.objects.create(tipo='recalcular_estatisticas', status=Tarefa.EXECUTANDO, tentativas=1)
+        # update() não passa pelo auto_now
+        Tarefa.objects.filter(id__in=[travada.id, esgotada.id]).update(atualizada_em=antiga)
+
+        self.assertEqual(tarefas.recuperar_tarefas_travadas(timedelta(minutes=10)), (1, 1))
+
+        for tarefa in (travada, esgotada, recente):
+            tarefa.refresh_from_db()
+        self.assertEqual(travada.status, Tarefa.PENDENTE)
+        self.assertEqual(esgotada.status, Tarefa.FALHOU)
+        self.assertEqual(recente.status, Tarefa.EXECUTANDO)
+
+    def test_tarefas_renovadas_pelo_worker_nao_sao_travadas(self):
+        antiga = timezone.now() - timedelta(hours=1)
+        tarefa = tarefas.enfileirar('recalcular_estatisticas')
+        tarefas.reivindicar_tarefa('worker')
+        Tarefa.objects.filter(id=tarefa.id).update(atualizada_em=antiga)
+
+        self.assertEqual(tarefas.renovar_tarefas([tarefa.id], 'outro-worker'), 0)
+        self.assertEqual(tarefas.renovar_tarefas([tarefa.id], 'worker'), 1)
+        self.assertEqual(tarefas.recuperar_tarefas_travadas(timedelta(minutes=10)), (0, 0))
+
+    def test_resultado_de_execucao_devolvida_a_fila_e_descartado(self):
+        def reassumida(tarefa):
+            # Enquanto esta execução roda, a tarefa é dada como travada e outro worker a assume
+            tarefas.devolver_tarefas([tarefa.id], 'Execução interrompida.')
+            tarefas._tentar_reivindicar(tarefa.id, 'worker-b', timezone.now())
+            return {'execucao': 'antiga'}
+
+        self.registrar_tipo('teste_reassumida', reassumida)
+        tarefa = tarefas.enfileirar('teste_reassumida')
+        tarefas.reivindicar_tarefa('worker-a')
+
+        self.assertIsNone(tarefas.executar_tarefa(tarefa.id))
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, Tarefa.EXECUTANDO)
+        self.assertEqual(tarefa.worker, 'worker-b')
+        self.assertIsNone(tarefa.resultado)
+
+    def test_importacao_continua_do_ultimo_lote_confirmado(self):
+        conteudo = 'nome,serial,data,categoria,status\n' + ''.join(
+            f'item {indice},SER{indice},2024-01-05,Notebooks,EM_USO\n' for indice in range(3)
+        )
+        tarefa = tarefas.enfileirar('importar_csv', conteudo=conteudo)
+        categoria = Categoria.objects.create(nome='Notebooks')
+        Equipamento.objects.create(nome='Item 0', serial='SER0', data=date(2024, 1, 5), categoria=categoria)
+        # Primeira tentativa confirmou a linha 1 antes de falhar
+        Tarefa.objects.filter(id=tarefa.id).update(resultado={
+            'linhas_processadas': 1, 'criados': 1, 'erros': [], 'total_erros': 0,
+        })
+
+        original = tarefas.INTERVALO_PROGRESSO
+        tarefas.INTERVALO_PROGRESSO = 1
+        self.addCleanup(setattr, tarefas, 'INTERVALO_PROGRESSO', original)
+        reivindicada = tarefas.reivindicar_tarefa('worker')
+        self.assertEqual(tarefas.executar_tarefa(reivindicada.id), Tarefa.CONCLUIDA)
+
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.resultado['criados'], 3)
+        self.assertEqual(tarefa.resultado['total_erros'], 0)
+        self.assertEqual(Equipamento.objects.count(), 3)
+
+
+class ViewsDeTarefasTests(TestCase):
+    """
+    As views de operações demoradas só enfileiram e redirecionam para o status
+    """
+
+    def assertRedirecionaParaStatus(self, response):
+        tarefa = Tarefa.objects.latest('id')
+        self.assertRedirects(response, reverse('status_tarefa', args=[tarefa.id]))
+        return tarefa
+
+    def test_importar(self):
+        arquivo = io.BytesIO(b'nome,serial,data,categoria,status\nx,y,2024-01-01,c,EM_USO\n')
+        arquivo.name = 'equipamentos.csv'
+        response = self.client.post(reverse('importar_equipamentos'), {'arquivo': arquivo})
+        self.assertEqual(self.assertRedirecionaParaStatus(response).tipo, 'importar_csv')
+
+    def test_exportar(self):
+        response = self.client.post(reverse('exportar_equipamentos'), {'busca': 'abc'})
+        tarefa = self.assertRedirecionaParaStatus(response)
+        self.assertEqual(tarefa.tipo, 'exportar_csv')
+        self.assertEqual(tarefa.parametros['busca'], 'abc')
+
+    def test_alterar_status(self):
+        response = self.client.post(reverse('alterar_status_em_massa'), {'novo_status': 'ESTOQUE'})
+        tarefa = self.assertRedirecionaParaStatus(response)
+        self.assertEqual(tarefa.parametros['novo_status'], 'ESTOQUE')
+
+    def test_recalcular_estatisticas(self):
+        response = self.client.post(reverse('recalcular_estatisticas'))
+        self.assertEqual(self.assertRedirecionaParaStatus(response).tipo, 'recalcular_estatisticas')
+
+
+class ExportacaoTests(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+
+    def test_exportacao_grava_arquivo_e_guarda_apenas_o_caminho(self):
+        categoria = Categoria.objects.create(nome='Monitores')
+        Equipamento.objects.create(nome='Monitor', serial='M1', data=date(2024, 1, 5), categoria=categoria)
+
+        with override_settings(MEDIA_ROOT=self.media):
+            tarefa = tarefas.enfileirar('exportar_csv')
+            tarefas.executar_tarefa(tarefas.reivindicar_tarefa('worker').id)
+            tarefa.refresh_from_db()
+            self.assertNotIn('csv', tarefa.resultado)
+
+            response = self.client.get(reverse('download_tarefa', args=[tarefa.id]))
+            conteudo = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Monitor,M1,2024-01-05,Monitores,EM_USO', conteudo)
+
+
+@override_settings(
+    ROOT_URLCONF=settings_leitura.ROOT_URLCONF,
+    INSTALLED_APPS=settings_leitura.INSTALLED_APPS,
+    MIDDLEWARE=settings_leitura.MIDDLEWARE,
+    TEMPLATES=settings_leitura.TEMPLATES,
+)
+class PerfilLeituraTests(TestCase):
+    """
+    O perfil enxuto (sem sessões, mensagens e autenticação) só expõe as
+    páginas de leitura, e elas funcionam sem esses apps
+    """
+
+    def test_paginas_de_leitura_sem_links_de_escrita(self):
+        categoria = Categoria.objects.create(nome='Monitores')
+        equipamento = Equipamento.objects.create(nome='Monitor', serial='M1', data=date(2024, 1, 5), categoria=categoria)
+
+        for url in ('/', f'/equipamento/{equipamento.id}/', '/relatorios/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            for link in ('/adicionar/', '/importar/', '/editar/', '/admin/'):
+                self.assertNotContains(response, link)
+
+    def test_urls_de_escrita_nao_existem(self):
+        for url in ('/adicionar/', '/importar/', '/exportar/', '/alterar-status/', '/admin/'):
+            self.assertEqual(self.client.post(url).status_code, 404)
+
+class InicializacaoTests(SimpleTestCase):
+
+    def test_medir_perfil_enxuto(self):
+        # Como o comando perfil_inicializacao: em um processo novo
+        processo = subprocess.run(
+            [sys.executable, '-m', 'projeto_django.inicializacao', 'projeto_django.settings_leitura'],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(processo.returncode, 0, processo.stderr)
+        resultado = json.loads(processo.stdout)
+
+        tipos = {etapa['tipo'] for etapa in resultado['etapas']}
+        self.assertTrue({'settings', 'app', 'middleware', 'urls', 'templates'} <= tipos)
+        nomes = {etapa['nome'] for etapa in resultado['etapas']}
+        self.assertIn('projeto_django.urls_leitura', nomes)
+        self.assertNotIn('django.contrib.admin', nomes)
+        self.assertEqual(resultado['templates_com_erro'], [])
+
+    def test_perfil_enxuto_nao_altera_o_perfil_padrao(self):
+        from projeto_django import settings as settings_padrao
+
+        self.assertIsNot(settings_leitura.TEMPLATES, settings_padrao.TEMPLATES)
+        self.assertIn(
+            'django.contrib.messages.context_processors.messages',
+            settings_padrao.TEMPLATES[0]['OPTIONS']['context_processors'],
+        )
+
+    def test_templates_com_erro_sao_reportados(self):
+        diretorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, diretorio, ignore_errors=True)
+        with open(os.path.join(diretorio, 'valido.html'), 'w') as arquivo:
+            arquivo.write('{{ valor }}')
+        with open(os.path.join(diretorio, 'quebrado.html'), 'w') as arquivo:
+            arquivo.write('{% if %}')
+
+        templates = [{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [diretorio],
+        }]
+        with override_settings(TEMPLATES=templates):
+            total, falhas = _carregar_templates()
+
+        self.assertEqual(total, 1)
+        self.assertEqual([falha['template'] for falha in falhas], ['quebrado.html'])
+        self.assertIn('TemplateSyntaxError', falhas[0]['erro'])
+
+
+class HistogramaIdadeTests(SimpleTestCase):
+
+    def test_percentil(self):
+        histograma = HistogramaIdade(max_meses=12)
+        for meses in (1, 2, 3, 4):
+            histograma.adicionar('a', meses)
+
+        self.assertEqual(histograma.percentil('a', 0.5), 2)
+        self.assertEqual(histograma.percentil('a', 0.9), 4)
+        self.assertEqual(histograma.percentil('a', 1), 4)
+        self.assertEqual(histograma.media('a'), 2.5)
+
+    def test_idades_acima_do_limite_ficam_na_ultima_posicao(self):
+        histograma = HistogramaIdade(max_meses=12)
+        histograma.adicionar('a', 1)
+        histograma.adicionar('a', 500)
+
+        self.assertEqual(histograma.percentil('a', 1), 12)
+        self.assertEqual(histograma.total('a'), 2)
+
+    def test_anos_atras_em_29_de_fevereiro(self):
+        self.assertEqual(_anos_atras(date(2024, 2, 29), 1), date(2023, 2, 28))
+        self.assertEqual(_anos_atras(date(2024, 2, 29), 4), date(2020, 2, 29))
+
+
+class RelatoriosTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.categoria = Categoria.objects.create(nome='Notebooks')
+
+    def criar(self, serial, data, status='EM_USO'):
+        return Equipamento.objects.create(
+            nome=f'Equipamento {serial}', serial=serial, data=data, categoria=self.categoria, status=status,
+        )
+
+    def test_faixas_de_idade_nos_limites_exatos(self):
+        hoje = date(2024, 6, 15)
+        self.criar('A', date(2023, 6, 16))  # 1 ano menos um dia
+        self.criar('B', date(2023, 6, 15))  # exatamente 1 ano
+        self.criar('C', date(2021, 6, 15))  # exatamente 3 anos
+        self.criar('D', date(2019, 6, 16))  # 5 anos menos um dia
+        self.criar('E', date(2019, 6, 15))  # exatamente 5 anos
+
+        [linha] = faixas_de_idade(hoje)
+        self.assertEqual(linha['faixas'], [1, 1, 2, 1])
+
+    def test_cache_invalidado_ao_salvar_excluir_e_alterar_em_massa(self):
+        self.assertEqual(obter_relatorio('status')[0]['total'], 0)
+
+        equipamento = self.criar('A', date(2024, 1, 5))
+        self.assertEqual(obter_relatorio('status')[0]['total'], 1)
+
+        equipamento.status = 'MANUTENCAO'
+        equipamento.save()
+        self.assertEqual(obter_relatorio('status')[0]['status'], [0, 0, 1])
+
+        tarefas.enfileirar('alterar_status', novo_status='ESTOQUE')
+        tarefas.executar_tarefa(tarefas.reivindicar_tarefa('worker').id)
+        self.assertEqual(obter_relatorio('status')[0]['status'], [0, 1, 0])
+
+        equipamento.delete()
+        self.assertEqual(obter_relatorio('status')[0]['total'], 0)
+
+    def test_importacao_incrementa_a_versao_uma_vez(self):
+        conteudo = 'nome,serial,data,categoria,status\n' + ''.join(
+            f'item {indice},SER{indice},2024-01-05,Monitores,EM_USO\n' for indice in range(5)
+        )
+        tarefas.enfileirar('importar_csv', conteudo=conteudo)
+        versao = VersaoInventario.atual()
+
+        tarefas.executar_tarefa(tarefas.reivindicar_tarefa('worker').id)
+
+        self.assertEqual(Equipamento.objects.count(), 5)
+        self.assertEqual(VersaoInventario.atual(), versao + 1)
+
+
+class ClienteRoteirizado(carga.Cliente):
+    """
+    Cliente de carga que responde com uma sequência fixa, sem servidor
+    """
+
+    def __init__(self, *respostas):
+        super().__init__(0, {'categorias': [1], 'equipamentos': [(1, 'S1', 1)]}, 0, 'CARGA-teste')
+        self.respostas = list(respostas)
+
+    def requisitar(self, metodo, caminho, campos=None):
+        return self.respostas.pop(0)
+
+
+class TesteCargaTests(SimpleTestCase):
+
+    FORMULARIO = b'<input type="hidden" name="csrfmiddlewaretoken" value="abc">'
+
+    def test_mix(self):
+        self.assertEqual(_mix('lista=3, busca=1,editar=0'), {'lista': 3.0, 'busca': 1.0})
+
+    def test_mix_invalido(self):
+        casos = {
+            'lista': 'tipo=peso',
+            'lista=1,outro=2': 'desconhecido',
+            'lista=x': 'peso inválido',
+            'lista=0,busca=0': 'maior que zero',
+        }
+        for valor, mensagem in casos.items():
+            with self.subTest(valor=valor):
+                with self.assertRaisesMessage(argparse.ArgumentTypeError, mensagem):
+                    _mix(valor)
+
+    def test_formulario_salvo_redireciona(self):
+        cliente = ClienteRoteirizado((200, 0.01, self.FORMULARIO), (302, 0.02, b''))
+        self.assertEqual(cliente.adicionar(), (True, 0.02))
+
+    def test_formulario_reexibido_conta_como_erro(self):
+        # Erro de validação (ex.: serial duplicado): o POST volta com 200
+        cliente = ClienteRoteirizado((200, 0.01, self.FORMULARIO), (200, 0.02, self.FORMULARIO))
+        self.assertFalse(cliente.adicionar()[0])
+        cliente = ClienteRoteirizado((200, 0.01, self.FORMULARIO), (200, 0.02, self.FORMULARIO))
+        self.assertFalse(cliente.editar()[0])
+
+    def test_formulario_sem_token_csrf_conta_como_erro(self):
+        cliente = ClienteRoteirizado((200, 0.01, b'<form></form>'))
+        self.assertFalse(cliente.adicionar()[0])
+
+    def test_seriais_usam_o_prefixo_do_cliente(self):
+        cliente = ClienteRoteirizado()
+        enviados = []
+        cliente._enviar_formulario = lambda caminho, campos: enviados.append(campos['serial'])
+        cliente.adicionar()
+        cliente.adicionar()
+        self.assertEqual(enviados, ['CARGA-teste-1', 'CARGA-teste-2'])
+
+    def test_percentil(self):
+        valores = list(range(1, 11))
+        self.assertEqual(carga.percentil(valores, 50), 5)
+        self.assertEqual(carga.percentil(valores, 90), 9)
+        self.assertEqual(carga.percentil(valores, 100), 10)
+        self.assertEqual(carga.percentil(valores, 0), 1)
+        self.assertIsNone(carga.percentil([], 50))
+
+    def test_resumir(self):
+        resumo = carga.resumir({'lista': [0.004, 0.001, 0.003, 0.002], 'busca': []}, {'lista': 1, 'busca': 2}, 2)
+
+        self.assertEqual(resumo['lista'], {
+            'requisicoes': 4, 'erros': 1, 'rps': 2.0,
+            'p50_ms': 2.0, 'p90_ms': 4.0, 'p99_ms': 4.0, 'max_ms': 4.0,
+        })
+        self.assertEqual(resumo['busca']['requisicoes'], 0)
+        self.assertIsNone(resumo['busca']['p50_ms'])
+        self.assertEqual(resumo['total']['requisicoes'], 4)
+        self.assertEqual(resumo['total']['erros'], 3)
+
+    def test_comparar(self):
+        def execucao(concorrencia, **endpoints):
+            return {
+                'servidor': 'wsgi', 'processos': 1, 'threads': 4, 'concorrencia': concorrencia,
+                'endpoints': {tipo: {'rps': rps, 'p99_ms': p99} for tipo, (rps, p99) in endpoints.items()},
+            }
+
+        anterior = {'execucoes': [execucao(1, lista=(100, 5))]}
+        atual = {'execucoes': [execucao(1, lista=(120, 4), busca=(50, 9)), execucao(2, lista=(150, 6))]}
+
+        # Só entram execuções e tipos presentes nos dois resultados
+        self.assertEqual(carga.comparar(anterior, atual), [
+            (('wsgi', 1, 4, 1), 'lista', 100, 120, 5, 4),
+        ])
@@ -16,6 +16,20 @@ urlpatterns = [
     
     # Excluir equipamento
     path('excluir/<int:equipamento_id>/', views.excluir_equipamento, name='excluir_equipamento'),
+    
+    # Operações em segundo plano
+    path('importar/', views.importar_equipamentos, name='importar_equipamentos'),
+    path('exportar/', views.exportar_equipamentos, name='exportar_equipamentos'),
+    path('alterar-status/', views.alterar_status_em_massa, name='alterar_status_em_massa'),
+    path('recalcular-estatisticas/', views.recalcular_estatisticas, name='recalcular_estatisticas'),
+    
+    # Status e resultado das tarefas
+    path('tarefa/<int:tarefa_id>/', views.status_tarefa, name='status_tarefa'),
+    path('tarefa/<int:tarefa_id>/download/', views.download_tarefa, name='download_tarefa'),
+    
+    # Relatórios
+    path('relatorios/', views.relatorio_inventario, name='relatorio_inventario'),
+    path('relatorios/<str:relatorio>.csv', views.relatorio_csv, name='relatorio_csv'),
 ]
 
 
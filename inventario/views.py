@@ -1,9 +1,17 @@
+import csv
+from pathlib import Path
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
-from .models import Equipamento, Categoria
-from .forms import EquipamentoForm
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.views.decorators.http import require_POST
+from .models import Equipamento, Categoria, Tarefa, VersaoInventario
+from .forms import EquipamentoForm, ImportarEquipamentosForm, AlterarStatusForm
+from .tarefas import enfileirar
+from . import relatorios
 
 # ==================== ABORDAGEM 1: FUNCTION-BASED VIEWS ====================
 
@@ -180,6 +188,154 @@ def excluir_equipamento(request, equipamento_id):
     return render(request, 'confirmar_exclusao.html', context)
 
 
+# ==================== TAREFAS EM SEGUNDO PLANO ====================
+# As operações demoradas apenas criam uma Tarefa; quem executa é o comando
+# "python manage.py processar_tarefas". O usuário é redirecionado para a
+# página de status da tarefa.
+
+def _filtros_lista(request):
+    """
+    Filtros da lista de equipamentos enviados junto com o formulário
+    """
+    return {
+        'busca': request.POST.get('busca') or None,
+        'categoria': request.POST.get('categoria') or None,
+        'status': request.POST.get('status') or None,
+    }
+
+
+def importar_equipamentos(request):
+    """
+    View de Importação - Envia um CSV para ser importado em segundo plano
+    """
+    if request.method == 'POST':
+        form = ImportarEquipamentosForm(request.POST, request.FILES)
+
+        if form.is_valid():
+            tarefa = enfileirar('importar_csv', conteudo=form.cleaned_data['arquivo'])
+            messages.success(request, 'Importação enviada para processamento.')
+            return redirect('status_tarefa', tarefa_id=tarefa.id)
+        else:
+            messages.error(request, 'Erro ao enviar arquivo. Verifique os campos.')
+    else:
+        form = ImportarEquipamentosForm()
+
+    context = {
+        'form': form,
+    }
+
+    return render(request, 'importar_equipamentos.html', context)
+
+
+@require_POST
+def exportar_equipamentos(request):
+    """
+    Enfileira a exportação em CSV dos equipamentos filtrados
+    """
+    tarefa = enfileirar('exportar_csv', **_filtros_lista(request))
+    messages.success(request, 'Exportação enviada para processamento.')
+    return redirect('status_tarefa', tarefa_id=tarefa.id)
+
+
+@require_POST
+def alterar_status_em_massa(request):
+    """
+    Enfileira a alteração de status de todos os equipamentos filtrados
+    """
+    form = AlterarStatusForm(request.POST)
+
+    if not form.is_valid():
+        messages.error(request, 'Selecione um status válido.')
+        return redirect('lista_equipamentos')
+
+    tarefa = enfileirar(
+        'alterar_status',
+        novo_status=form.cleaned_data['novo_status'],
+        **_filtros_lista(request)
+    )
+    messages.success(request, 'Alteração de status enviada para processamento.')
+    return redirect('status_tarefa', tarefa_id=tarefa.id)
+
+
+@require_POST
+def recalcular_estatisticas(request):
+    """
+    Enfileira o recálculo dos totais por status e categoria
+    """
+    tarefa = enfileirar('recalcular_estatisticas')
+    messages.success(request, 'Recálculo das estatísticas enviado para processamento.')
+    return redirect('status_tarefa', tarefa_id=tarefa.id)
+
+
+def status_tarefa(request, tarefa_id):
+    """
+    View de Status - Exibe o andamento de uma tarefa em segundo plano
+    """
+    tarefa = get_object_or_404(Tarefa.objects.defer('parametros'), id=tarefa_id)
+
+    context = {
+        'tarefa': tarefa,
+    }
+
+    return render(request, 'status_tarefa.html', context)
+
+
+def download_tarefa(request, tarefa_id):
+    """
+    Download do CSV gerado por uma tarefa de exportação concluída
+    """
+    tarefa = get_object_or_404(Tarefa, id=tarefa_id, tipo='exportar_csv', status=Tarefa.CONCLUIDA)
+
+    if not tarefa.resultado or 'arquivo' not in tarefa.resultado:
+        raise Http404('Arquivo não encontrado.')
+
+    caminho = Path(settings.MEDIA_ROOT) / tarefa.resultado['arquivo']
+    if not caminho.is_file():
+        raise Http404('Arquivo não encontrado.')
+
+    return FileResponse(
+        open(caminho, 'rb'),
+        as_attachment=True,
+        filename=tarefa.resultado['nome_arquivo'],
+        content_type='text/csv; charset=utf-8',
+    )
+
+
+# ==================== RELATÓRIOS ====================
+
+def relatorio_inventario(request):
+    """
+    View de Relatórios - Aquisições por mês, status por categoria e idade
+    """
+    # Uma única consulta da versão para os quatro relatórios
+    versao = VersaoInventario.atual()
+    
+    context = {
+        'aquisicoes': relatorios.obter_relatorio('aquisicoes', versao),
+        'status_por_categoria': relatorios.obter_relatorio('status', versao),
+        'faixas_de_idade': relatorios.obter_relatorio('idade', versao),
+        'estatisticas_idade': relatorios.obter_relatorio('estatisticas_idade', versao),
+        'status_escolha': Equipamento.status_escolha,
+        'faixas': [rotulo for rotulo, _, _ in relatorios.FAIXAS_IDADE],
+    }
+
+    return render(request, 'relatorio_inventario.html', context)
+
+
+def relatorio_csv(request, relatorio):
+    """
+    Download de um relatório em CSV
+    """
+    if relatorio not in relatorios.RELATORIOS:
+        raise Http404('Relatório não encontrado.')
+
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="relatorio_{relatorio}.csv"'
+    writer = csv.writer(response)
+    writer.writerows(relatorios.linhas_csv(relatorio))
+    return response
+
+
 # ==================== ABORDAGEM 2: CLASS-BASED VIEWS ====================
 # (Comentadas - descomente se preferir usar classes)
 
@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projeto_django.settings')
 
 application = get_asgi_application()
+
+# Com DJANGO_PRECARREGAR=1 (ex.: gunicorn --preload) URLs, templates e
+# metadados dos models são carregados no processo principal, antes do fork,
+# e compartilhados entre os workers.
+if os.environ.get('DJANGO_PRECARREGAR') == '1':
+    from projeto_django.inicializacao import precarregar
+
+    precarregar()
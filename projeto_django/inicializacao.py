@@ -0,0 +1,189 @@
+"""
+Medição e pré-aquecimento da inicialização do projeto.
+
+- medir(): configura o Django passo a passo e registra o tempo de importação
+  e o aumento de memória (RSS) de cada app, middleware e do URLconf. Deve
+  rodar em um processo novo (veja o comando ``manage.py perfil_inicializacao``),
+  senão tudo já estará importado.
+- precarregar(): importa e aquece URLconf, templates e metadados dos models
+  antes do fork dos workers (gunicorn --preload), para que essas estruturas
+  sejam compartilhadas entre os processos via copy-on-write.
+"""
+import gc
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def rss_atual():
+    """
+    Memória residente (RSS) do processo atual, em bytes
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Fora do Linux só há o pico de memória (em KB no Linux, bytes no macOS)
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+
+class _Medidor:
+    def __init__(self):
+        self.etapas = []
+
+    def medir(self, tipo, nome, funcao, *args, **kwargs):
+        rss_inicio = rss_atual()
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            self.etapas.append({
+                'tipo': tipo,
+                'nome': nome,
+                'tempo_ms': round((time.perf_counter() - inicio) * 1000, 3),
+                'rss_kb': (rss_atual() - rss_inicio) // 1024,
+            })
+
+
+def medir(settings_module):
+    """
+    Inicializa o Django com ``settings_module`` e retorna as medições.
+
+    Os tempos são atribuídos a quem importa primeiro: um módulo compartilhado
+    entre dois apps aparece no primeiro da lista de INSTALLED_APPS.
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    medidor = _Medidor()
+    rss_inicial = rss_atual()
+    inicio = time.perf_counter()
+
+    import django
+    from django.apps import AppConfig
+    from django.conf import settings
+
+    medidor.medir('settings', settings_module, lambda: settings.INSTALLED_APPS)
+
+    # Envolve as fases do apps.populate() para medir cada app separadamente
+    criar_original = AppConfig.create.__func__
+    importar_models_original = AppConfig.import_models
+
+    def criar(cls, entry):
+        app_config = medidor.medir('app', entry, criar_original, cls, entry)
+        ready_original = app_config.ready
+        app_config.ready = lambda: medidor.medir('ready', app_config.name, ready_original)
+        return app_config
+
+    def importar_models(self):
+        return medidor.medir('models', self.name, importar_models_original, self)
+
+    AppConfig.create = classmethod(criar)
+    AppConfig.import_models = importar_models
+    try:
+        django.setup()
+    finally:
+        AppConfig.create = classmethod(criar_original)
+        AppConfig.import_models = importar_models_original
+
+    from django.urls import get_resolver
+    from django.utils.module_loading import import_string
+
+    for caminho in settings.MIDDLEWARE:
+        medidor.medir('middleware', caminho, import_string, caminho)
+
+    medidor.medir('urls', settings.ROOT_URLCONF, _carregar_urls, get_resolver())
+    _, templates_com_erro = medidor.medir('templates', 'todos', _carregar_templates)
+    medidor.medir('metadados', 'models', _carregar_metadados)
+
+    return {
+        'settings': settings_module,
+        'tempo_total_ms': round((time.perf_counter() - inicio) * 1000, 3),
+        'rss_inicial_kb': rss_inicial // 1024,
+        'rss_final_kb': rss_atual() // 1024,
+        'etapas': medidor.etapas,
+        'templates_com_erro': templates_com_erro,
+    }
+
+
+def _carregar_urls(resolver):
+    # reverse_dict força a importação de todos os URLconfs incluídos
+    resolver.reverse_dict
+    return resolver
+
+
+def _carregar_templates():
+    """
+    Compila todos os templates encontrados (ficam no cache do loader).
+
+    Retorna a quantidade compilada e a lista de templates que falharam, com
+    o erro de cada um, para que um template quebrado não passe despercebido.
+    """
+    from django.template import engines
+    from django.template.loaders.cached import Loader as CachedLoader
+
+    total = 0
+    falhas = []
+    for engine in engines.all():
+        motor = getattr(engine, 'engine', None)
+        if motor is None:
+            continue
+        for loader in motor.template_loaders:
+            loaders = loader.loaders if isinstance(loader, CachedLoader) else [loader]
+            for diretorio in (d for l in loaders for d in l.get_dirs()):
+                for raiz, _, arquivos in os.walk(diretorio):
+                    for arquivo in arquivos:
+                        if not arquivo.endswith(('.html', '.txt')):
+                            continue
+                        nome = os.path.relpath(os.path.join(raiz, arquivo), diretorio).replace(os.sep, '/')
+                        try:
+                            engine.get_template(nome)
+                            total += 1
+                        except Exception as exc:
+                            # Um template com erro não impede o carregamento dos demais
+                            falhas.append({'template': nome, 'erro': f'{type(exc).__name__}: {exc}'})
+    return total, falhas
+
+
+def _carregar_metadados():
+    """
+    Preenche os caches de campos e relações de todos os models
+    """
+    from django.apps import apps
+
+    for model in apps.get_models():
+        model._meta.get_fields()
+        model._meta.concrete_fields
+        model._meta.related_objects
+
+
+def precarregar():
+    """
+    Aquece o processo principal antes do fork dos workers.
+
+    Depois do aquecimento, gc.freeze() move os objetos existentes para a
+    geração permanente: o coletor de lixo deixa de percorrê-los nos workers,
+    evitando cópias das páginas compartilhadas.
+    """
+    from django.db import connections
+    from django.urls import get_resolver
+
+    _carregar_urls(get_resolver())
+    _, falhas = _carregar_templates()
+    for falha in falhas:
+        logger.warning('Template %s não pôde ser pré-carregado: %s', falha['template'], falha['erro'])
+    _carregar_metadados()
+
+    # Conexões abertas não podem ser compartilhadas entre processos
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+
+
+if __name__ == '__main__':
+    settings_module = sys.argv[1] if len(sys.argv) > 1 else 'projeto_django.settings'
+    json.dump(medir(settings_module), sys.stdout)
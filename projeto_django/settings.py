@@ -12,9 +12,13 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# O arquivo .env só é lido quando as variáveis não vieram do ambiente
+# (em produção elas já estão definidas e a leitura é evitada na inicialização)
+if 'SECRET_KEY' not in os.environ:
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -121,6 +125,12 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Arquivos gerados pela aplicação (ex.: exportações em CSV das tarefas)
+
+MEDIA_URL = 'media/'
+
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
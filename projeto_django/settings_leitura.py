@@ -0,0 +1,47 @@
+"""
+Perfil enxuto para workers somente leitura (listagem, busca e detalhe).
+
+Remove os apps e middlewares que essas páginas não usam (admin, sessões,
+autenticação e mensagens), reduzindo o tempo de inicialização e a memória
+de cada worker. As páginas de escrita dependem desses apps, então o perfil
+usa um URLconf próprio apenas com as views de leitura. Uso:
+
+    DJANGO_SETTINGS_MODULE=projeto_django.settings_leitura gunicorn projeto_django.wsgi
+
+Compare com o perfil padrão usando ``python manage.py perfil_inicializacao``.
+"""
+
+import copy
+
+from .settings import *  # noqa: F401,F403
+
+
+APPS_DISPENSAVEIS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+]
+
+MIDDLEWARE_DISPENSAVEIS = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+ROOT_URLCONF = 'projeto_django.urls_leitura'
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in APPS_DISPENSAVEIS]
+
+MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in MIDDLEWARE_DISPENSAVEIS]
+
+# Cópia: o import * compartilha o mesmo dicionário com projeto_django.settings
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    'django.template.context_processors.request',
+]
+
+# Sem o app de autenticação não há validadores de senha
+AUTH_PASSWORD_VALIDATORS = []
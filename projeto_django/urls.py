@@ -1,9 +1,13 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    
     # Incluir as URLs do app inventario
     path('', include('inventario.urls')),
-]
\ No newline at end of file
+]
+
+# O admin não é carregado no perfil enxuto (settings_leitura)
+if 'django.contrib.admin' in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
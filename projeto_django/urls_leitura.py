@@ -0,0 +1,13 @@
+from django.urls import path
+
+from inventario import views
+
+# URLconf do perfil enxuto (settings_leitura): apenas as páginas somente
+# leitura. Cadastro, edição, importação e operações em massa dependem de
+# mensagens e sessões, que esse perfil não carrega.
+urlpatterns = [
+    path('', views.lista_equipamentos, name='lista_equipamentos'),
+    path('equipamento/<int:equipamento_id>/', views.detalhe_equipamento, name='detalhe_equipamento'),
+    path('relatorios/', views.relatorio_inventario, name='relatorio_inventario'),
+    path('relatorios/<str:relatorio>.csv', views.relatorio_csv, name='relatorio_csv'),
+]
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projeto_django.settings')
 
 application = get_wsgi_application()
+
+# Com DJANGO_PRECARREGAR=1 (ex.: gunicorn --preload) URLs, templates e
+# metadados dos models são carregados no processo principal, antes do fork,
+# e compartilhados entre os workers.
+if os.environ.get('DJANGO_PRECARREGAR') == '1':
+    from projeto_django.inicializacao import precarregar
+
+    precarregar()